@@ -24,6 +24,22 @@ export default function Home() {
       })
   }, [])
 
+  // live rating pushes from the API's watch mode (no-op if it is disabled)
+  useEffect(() => {
+    const source = new EventSource('http://localhost:8000/stream/elo')
+    source.addEventListener('elo', e => {
+      const { ratings } = JSON.parse(e.data)
+      setElos(prev => {
+        const byName = new Map(prev.map(row => [row.wrestler, row]))
+        ratings.forEach(r => byName.set(r.wrestler, { wrestler: r.wrestler, elo: r.elo }))
+        return [...byName.values()]
+          .sort((a, b) => b.elo - a.elo)
+          .slice(0, 50)
+      })
+    })
+    return () => source.close()
+  }, [])
+
   if (loading) return <p>Loading…</p>
   if (error)   return <p className="error">{error}</p>
 
@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, Query, HTTPException
-from sqlalchemy import text, select, func, and_
+from sqlalchemy import select, or_
 from sqlalchemy.orm import Session
 from typing import List, Optional
+import datetime
 
 from src.db import SessionLocal
-from src.models import elo_history
+from src.models import elo_history, head_to_head, wrestlers_dim, current_elo
 
 router = APIRouter(prefix="/elo", tags=["elo"])
 
@@ -26,29 +27,14 @@ def list_current_elos(
     Returns each wrestler’s latest ELO (elo_after from their most recent match),
     ordered descending. Supports paging and optional name‐filter.
     """
-    # Postgres “DISTINCT ON” subquery to grab latest per wrestler:
-    stmt = text("""
-    SELECT DISTINCT ON (wrestler) wrestler, elo_after
-    FROM elo_history
-    /** optional name filter **/
-    WHERE (:name IS NULL OR wrestler ILIKE :name_pattern)
-    ORDER BY wrestler, match_id DESC
-    OFFSET :offset
-    LIMIT  :limit
-    """)
-    params = {
-        "name": name,
-        "name_pattern": f"%{name}%" if name else None,
-        "limit": limit,
-        "offset": offset,
-    }
-    rows = db.execute(stmt, params).all()
-    # now order in Python by elo descending
-    result = sorted(
-        [{"wrestler": r[0], "elo": r[1]} for r in rows],
-        key=lambda x: x["elo"], reverse=True
-    )
-    return result
+    # one row per wrestler, kept current by the Elo writers
+    stmt = select(current_elo.c.wrestler, current_elo.c.elo)
+    if name:
+        stmt = stmt.where(current_elo.c.wrestler.ilike(f"%{name}%"))
+    stmt = stmt.order_by(current_elo.c.elo.desc()).offset(offset).limit(limit)
+
+    rows = db.execute(stmt).all()
+    return [{"wrestler": r.wrestler, "elo": r.elo} for r in rows]
 
 
 @router.get("/top", response_model=List[dict])
@@ -56,32 +42,104 @@ def top_elos(
     db: Session = Depends(get_db),
     limit: int = Query(50, ge=1, le=500),
 ):
-    # for each wrestler grab the latest match_id…
-    subq = (
-        select(
-            elo_history.c.wrestler,
-            func.max(elo_history.c.match_id).label("latest_mid")
-        )
-        .group_by(elo_history.c.wrestler)
-        .subquery()
-    )
-
-    # …join back to get their most recent elo_after, then sort desc
+    # ix_current_elo_elo → an index scan that stops after `limit` rows
     stmt = (
-        select(
-            elo_history.c.wrestler,
-            elo_history.c.elo_after.label("current_elo")
-        )
-        .join(
-            subq,
-            and_(
-                elo_history.c.wrestler == subq.c.wrestler,
-                elo_history.c.match_id == subq.c.latest_mid
-            )
-        )
-        .order_by(elo_history.c.elo_after.desc())
+        select(current_elo.c.wrestler, current_elo.c.elo)
+        .order_by(current_elo.c.elo.desc())
         .limit(limit)
     )
 
     rows = db.execute(stmt).all()
-    return [{"wrestler": r.wrestler, "elo": r.current_elo} for r in rows]
\ No newline at end of file
+    return [{"wrestler": r.wrestler, "elo": r.elo} for r in rows]
+
+
+@router.get("/history", response_model=List[dict])
+def wrestler_history(
+    db: Session = Depends(get_db),
+    wrestler: str = Query(..., description="Exact wrestler name"),
+    date_from: Optional[datetime.date] = None,
+    date_to: Optional[datetime.date] = None,
+    limit: int = Query(500, ge=1, le=5000),
+):
+    """
+    One wrestler's Elo history, newest first, optionally bounded by date.
+    Served by the (wrestler_id, date, id) index; date bounds let Postgres prune
+    the yearly partitions.
+    """
+    wrestler_id = db.execute(
+        select(wrestlers_dim.c.wrestler_id).where(wrestlers_dim.c.name == wrestler)
+    ).scalar()
+    if wrestler_id is None:
+        raise HTTPException(status_code=404, detail=f"Unknown wrestler: {wrestler}")
+
+    stmt = select(elo_history).where(elo_history.c.wrestler_id == wrestler_id)
+    if date_from:
+        stmt = stmt.where(elo_history.c.date >= date_from)
+    if date_to:
+        stmt = stmt.where(elo_history.c.date <= date_to)
+    stmt = stmt.order_by(elo_history.c.date.desc(), elo_history.c.id.desc()).limit(limit)
+
+    rows = db.execute(stmt).mappings().all()
+    return [dict(r) for r in rows]
+
+
+@router.get("/head-to-head", response_model=dict)
+def head_to_head_record(
+    db: Session = Depends(get_db),
+    a: str = Query(..., description="Wrestler whose perspective the record is from"),
+    b: str = Query(..., description="Opponent"),
+):
+    """
+    A's record against B, served from the precomputed head_to_head aggregates.
+    """
+    if a == b:
+        raise HTTPException(status_code=400, detail="a and b must be different wrestlers")
+
+    # pairs are stored with wrestler_a < wrestler_b → single primary-key probe
+    first, second = sorted((a, b))
+    row = db.execute(
+        select(head_to_head).where(
+            head_to_head.c.wrestler_a == first,
+            head_to_head.c.wrestler_b == second,
+        )
+    ).mappings().first()
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"No meetings between {a} and {b}")
+
+    flip = row["wrestler_a"] != a
+    return {
+        "wrestler":      a,
+        "opponent":      b,
+        "meetings":      row["meetings"],
+        "wins":          row["wins_b"] if flip else row["wins_a"],
+        "losses":        row["wins_a"] if flip else row["wins_b"],
+        "net_elo":       row["net_elo_b"] if flip else row["net_elo_a"],
+        "opponent_net_elo": row["net_elo_a"] if flip else row["net_elo_b"],
+        "last_match_id": row["last_match_id"],
+        "last_date":     row["last_date"],
+    }
+
+
+@router.get("/rivalries", response_model=List[dict])
+def top_rivalries(
+    db: Session = Depends(get_db),
+    limit: int = Query(20, ge=1, le=500),
+    min_meetings: int = Query(2, ge=1),
+    wrestler: Optional[str] = Query(None, description="Only rivalries involving this wrestler"),
+):
+    """
+    Most frequent pairings, ordered by number of meetings then recency.
+    """
+    stmt = select(head_to_head).where(head_to_head.c.meetings >= min_meetings)
+    if wrestler:
+        stmt = stmt.where(or_(
+            head_to_head.c.wrestler_a == wrestler,
+            head_to_head.c.wrestler_b == wrestler,
+        ))
+    stmt = stmt.order_by(
+        head_to_head.c.meetings.desc(),
+        head_to_head.c.last_date.desc(),
+    ).limit(limit)
+
+    rows = db.execute(stmt).mappings().all()
+    return [dict(r) for r in rows]
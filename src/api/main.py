@@ -1,7 +1,12 @@
+import asyncio
+import os
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from src.api.matches import router as matches_router
 from src.api.elo     import router as elo_router
+from src.api.search  import router as search_router
+from src.api.stream  import router as stream_router, run_watcher
 
 app = FastAPI(title="WWE Elo Tracker API")
 
@@ -14,4 +19,22 @@ app.add_middleware(
 
 # mount routers
 app.include_router(matches_router)
-app.include_router(elo_router)
\ No newline at end of file
+app.include_router(elo_router)
+app.include_router(search_router)
+app.include_router(stream_router)
+
+# seconds between result polls; 0 (default) leaves watch mode off
+WATCH_INTERVAL = int(os.getenv("WATCH_INTERVAL", "0"))
+
+
+@app.on_event("startup")
+async def start_watcher():
+    if WATCH_INTERVAL > 0:
+        app.state.watch_task = asyncio.create_task(run_watcher(WATCH_INTERVAL))
+
+
+@app.on_event("shutdown")
+async def stop_watcher():
+    task = getattr(app.state, "watch_task", None)
+    if task:
+        task.cancel()
\ No newline at end of file
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import List
+
+from src.db import SessionLocal
+from src.search import live_index
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@router.get("/", response_model=List[dict])
+def search_wrestlers(
+    db: Session = Depends(get_db),
+    q: str = Query(..., min_length=1, description="Name prefix or approximate name"),
+    limit: int = Query(10, ge=1, le=50),
+):
+    """
+    Type-ahead wrestler search served from the in-process index.
+    The session is only used when the index is due for a generation check.
+    """
+    return live_index.get(db).search(q, limit=limit)
@@ -0,0 +1,90 @@
+import asyncio
+import json
+from typing import Any, Dict, Optional, Set
+
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+
+from src.search import live_index
+
+router = APIRouter(prefix="/stream", tags=["stream"])
+
+KEEPALIVE_SECONDS = 15
+QUEUE_SIZE        = 100
+
+
+class Broadcaster:
+    """
+    Fan-out of watch-mode updates to connected SSE clients.
+    Slow clients drop updates rather than holding up everyone else.
+    """
+
+    def __init__(self) -> None:
+        self.subscribers: Set[asyncio.Queue] = set()
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self.subscribers.discard(queue)
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        for queue in self.subscribers:
+            if not queue.full():
+                queue.put_nowait(event)
+
+
+broadcaster = Broadcaster()
+
+
+async def run_watcher(interval: int, url: Optional[str] = None) -> None:
+    """
+    Background task: poll for new results and push each update to clients.
+    The blocking scrape + DB work runs in a worker thread.
+    """
+    watcher = None
+    while True:
+        try:
+            # imported and built inside the loop so a DB that isn't up yet is
+            # retried (the import creates the scraper's tables)
+            if watcher is None:
+                from src.watch import Watcher
+                watcher = await asyncio.to_thread(Watcher, url) if url else await asyncio.to_thread(Watcher)
+                print(f"[INFO] Watch mode: polling {watcher.url} every {interval}s")
+            update = await asyncio.to_thread(watcher.poll_once)
+            if update:
+                live_index.invalidate()
+                broadcaster.publish(update)
+        except Exception as exc:
+            print(f"[WARN] Watch poll failed: {exc}")
+        await asyncio.sleep(interval)
+
+
+@router.get("/elo")
+async def stream_elo():
+    """
+    Server-Sent Events stream of rating updates (`event: elo`), one event per
+    poll that found new matches. Comment lines keep idle connections open.
+    """
+    queue = broadcaster.subscribe()
+
+    async def events():
+        try:
+            yield ": connected\n\n"
+            while True:
+                try:
+                    update = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: elo\ndata: {json.dumps(update, default=str)}\n\n"
+        finally:
+            broadcaster.unsubscribe(queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,5 +1,6 @@
 import os
-from sqlalchemy import create_engine, MetaData
+from contextlib import contextmanager
+from sqlalchemy import create_engine, MetaData, text
 from sqlalchemy.orm import sessionmaker
 
 # pick up DATABASE_URL like: postgresql://user:pass@db:5432/wwe
@@ -15,3 +16,23 @@ engine = create_engine(
 )
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 metadata = MetaData()
+
+# Postgres advisory lock key shared by every process that writes gold.elo_history
+ELO_WRITER_LOCK = 5_738_001
+
+
+@contextmanager
+def elo_writer_lock():
+    """
+    Serialize Elo writers across processes (batch replay vs watch mode) with a
+    Postgres session advisory lock. No-op on other backends.
+    """
+    if not engine.dialect.name.startswith("postg"):
+        yield
+        return
+    with engine.connect() as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": ELO_WRITER_LOCK})
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": ELO_WRITER_LOCK})
@@ -1,12 +1,13 @@
 # src/elo.py
 
 import pandas as pd
-from typing import Dict, List, Any, Tuple, Optional
+from typing import Dict, List, Any, Tuple, Optional, Set
 
-from sqlalchemy import select, insert, delete, text
+from sqlalchemy import select, insert, update, delete, text, case, and_, or_, inspect, bindparam, table, column
 from sqlalchemy.dialects.postgresql import insert as pg_insert
-from src.db import SessionLocal, engine, metadata
-from src.models import matches_raw as matches, elo_history
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from src.db import SessionLocal, engine, metadata, elo_writer_lock
+from src.models import matches_raw as matches, elo_history, head_to_head, wrestlers_dim, current_elo, PARTITIONED
 
 DEFAULT_ELO = 1000
 K_FACTOR   = 32
@@ -31,7 +32,8 @@ def update_elos(
     Process all matches in df (chronologically), update ELOs and record history.
 
     Args:
-        df: DataFrame must include at least ['id','winners','losers'].
+        df: DataFrame must include at least ['id','winners','losers'];
+            'date' is carried into the history records when present.
         initial_elos: optional starting ELOs; defaults to 1000 for newcomers.
 
     Returns:
@@ -44,6 +46,7 @@ def update_elos(
     # df is newest→oldest → reverse to oldest first
     for _, row in df.iloc[::-1].iterrows():
         match_id = row['id']
+        date     = row.get('date')
         winners  = [w.strip() for w in str(row['winners']).split(',') if w.strip()]
         losers   = [l.strip() for l in str(row['losers']).split(',')  if l.strip()]
 
@@ -59,6 +62,7 @@ def update_elos(
             elo_ratings[w] = after
             history.setdefault(w, []).append({
                 'match_id':   match_id,
+                'date':       date,
                 'wrestler':   w,
                 'opponents':  ', '.join(losers),
                 'elo_before': before,
@@ -79,6 +83,7 @@ def update_elos(
             elo_ratings[l] = after
             history.setdefault(l, []).append({
                 'match_id':   match_id,
+                'date':       date,
                 'wrestler':   l,
                 'opponents':  ', '.join(winners),
                 'elo_before': before,
@@ -90,22 +95,422 @@ def update_elos(
     return elo_ratings, history
 
 
-def refresh_elo_history(records: List[Dict[str, Any]]) -> None:
+def new_match_ids(df: pd.DataFrame) -> Set[int]:
+    """
+    Match ids in df that have not been folded into head_to_head yet.
+
+    Anything already present in elo_history was processed by a previous run.
+    An empty head_to_head table means nothing has been aggregated, so every
+    match counts as new (first run / backfill).
+    """
+    ids = set(int(i) for i in df['id']) if not df.empty else set()
+    session = SessionLocal()
+    try:
+        has_pairs = session.execute(select(head_to_head.c.wrestler_a).limit(1)).first()
+        if not has_pairs:
+            return ids
+        seen = session.execute(select(elo_history.c.match_id).distinct()).scalars().all()
+    finally:
+        session.close()
+    return ids - set(seen)
+
+
+def head_to_head_deltas(
+    df: pd.DataFrame,
+    history: Dict[str, List[Dict[str, Any]]],
+    match_ids: Set[int],
+) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """
+    Aggregate pairwise results for the matches in match_ids.
+
+    Every winner is paired with every loser (partners are not rivals). A
+    wrestler's Elo change is split evenly across the opponents on the other
+    side, so net Elo per pair sums back to the match total.
+
+    Returns:
+        {(wrestler_a, wrestler_b): stats} keyed canonically (a < b).
+    """
+    changes = {
+        (rec['match_id'], rec['wrestler']): rec['elo_change']
+        for recs in history.values() for rec in recs
+    }
+    deltas: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    # oldest first, so the last write per pair is its latest meeting
+    for _, row in df.iloc[::-1].iterrows():
+        match_id = int(row['id'])
+        if match_id not in match_ids:
+            continue
+        winners = [w.strip() for w in str(row['winners']).split(',') if w.strip()]
+        losers  = [l.strip() for l in str(row['losers']).split(',')  if l.strip()]
+        date    = row.get('date')
+
+        for w in winners:
+            for l in losers:
+                if w == l:
+                    continue
+                a, b = sorted((w, l))
+                pair = deltas.setdefault((a, b), {
+                    'meetings': 0, 'wins_a': 0, 'wins_b': 0,
+                    'net_elo_a': 0.0, 'net_elo_b': 0.0,
+                    'last_match_id': None, 'last_date': None,
+                })
+                w_share = changes.get((match_id, w), 0.0) / len(losers)
+                l_share = changes.get((match_id, l), 0.0) / len(winners)
+
+                pair['meetings'] += 1
+                if w == a:
+                    pair['wins_a']    += 1
+                    pair['net_elo_a'] += w_share
+                    pair['net_elo_b'] += l_share
+                else:
+                    pair['wins_b']    += 1
+                    pair['net_elo_b'] += w_share
+                    pair['net_elo_a'] += l_share
+                if pair['last_date'] is None or (date is not None and date >= pair['last_date']):
+                    pair['last_match_id'] = match_id
+                    pair['last_date']     = date
+
+    return deltas
+
+
+def upsert_head_to_head(session, deltas: Dict[Tuple[str, str], Dict[str, Any]]) -> None:
+    """
+    Add deltas onto the head_to_head aggregates (insert new pairs, increment existing).
+    """
+    if not deltas:
+        return
+    rows = [{'wrestler_a': a, 'wrestler_b': b, **stats} for (a, b), stats in deltas.items()]
+
+    stmt = pg_insert(head_to_head) if engine.dialect.name.startswith("postg") else sqlite_insert(head_to_head)
+    h2h, new = head_to_head.c, stmt.excluded
+    newer = or_(h2h.last_date.is_(None), new.last_date >= h2h.last_date)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[h2h.wrestler_a, h2h.wrestler_b],
+        set_={
+            'meetings':      h2h.meetings  + new.meetings,
+            'wins_a':        h2h.wins_a    + new.wins_a,
+            'wins_b':        h2h.wins_b    + new.wins_b,
+            'net_elo_a':     h2h.net_elo_a + new.net_elo_a,
+            'net_elo_b':     h2h.net_elo_b + new.net_elo_b,
+            'last_match_id': case((newer, new.last_match_id), else_=h2h.last_match_id),
+            'last_date':     case((newer, new.last_date),     else_=h2h.last_date),
+        },
+    )
+    session.execute(stmt, rows)
+
+
+def ensure_elo_history_schema() -> None:
+    """
+    Drop a gold.elo_history created by an older layout (no date/wrestler_id,
+    not partitioned on Postgres, no AUTOINCREMENT on SQLite) so create_all
+    can rebuild it. The table
+    is fully derived from bronze; head_to_head is cleared with it because it
+    uses elo_history to tell which matches were already aggregated.
+    """
+    insp = inspect(engine)
+    if not insp.has_table("elo_history", schema="gold"):
+        return
+
+    cols = {c["name"] for c in insp.get_columns("elo_history", schema="gold")}
+    partitioned = True
+    if engine.dialect.name == "sqlite":
+        # "partitioned" stands in for AUTOINCREMENT here (ids must never be reused)
+        with engine.connect() as conn:
+            ddl = conn.execute(text(
+                "SELECT sql FROM gold.sqlite_master WHERE type = 'table' AND name = 'elo_history'"
+            )).scalar() or ""
+        partitioned = "AUTOINCREMENT" in ddl.upper()
+    if PARTITIONED:
+        with engine.connect() as conn:
+            partitioned = conn.execute(text("""
+                SELECT 1 FROM pg_partitioned_table pt
+                JOIN pg_class c     ON c.oid = pt.partrelid
+                JOIN pg_namespace n ON n.oid = c.relnamespace
+                WHERE n.nspname = 'gold' AND c.relname = 'elo_history'
+            """)).first() is not None
+
+    if {"date", "wrestler_id"} <= cols and partitioned:
+        # (wrestler_id, date) became (wrestler_id, date, id) for the id tie-break
+        with engine.begin() as conn:
+            conn.execute(text("DROP INDEX IF EXISTS gold.ix_elo_history_wrestler_id_date"))
+        for idx in elo_history.indexes:
+            idx.create(engine, checkfirst=True)
+        return
+
+    print("[INFO] Rebuilding gold.elo_history with date/wrestler_id partitioned layout")
+    with engine.begin() as conn:
+        elo_history.drop(conn)
+        if insp.has_table("head_to_head", schema="gold"):
+            conn.execute(delete(head_to_head))
+
+
+def partition_for(year: int):
+    """
+    Lightweight handle on the yearly partition gold.elo_history_<year>.
+    """
+    cols = [column(c.name) for c in elo_history.c if c.name != "id"]
+    return table(f"elo_history_{year}", *cols, schema="gold")
+
+
+def ensure_partitions(session, years: Set[int]) -> None:
+    """
+    Create any missing yearly range partitions (Postgres only).
+    """
+    if not PARTITIONED:
+        return
+    for year in sorted(years):
+        session.execute(text(
+            f"CREATE TABLE IF NOT EXISTS gold.elo_history_{year:d} "
+            f"PARTITION OF gold.elo_history "
+            f"FOR VALUES FROM ('{year:d}-01-01') TO ('{year + 1:d}-01-01')"
+        ))
+
+
+def write_elo_rows(session, records: List[Dict[str, Any]]) -> None:
+    """
+    Insert history rows in (date, match_id) order, routed straight to their
+    yearly partition on Postgres (skips per-row tuple routing through the parent).
+
+    Writing in date order keeps each BRIN block range narrow and makes ids
+    chronological, which the search index and leaderboards rely on.
+    """
+    if not records:
+        return
+    records = sorted(records, key=lambda rec: (rec['date'], rec['match_id']))
+    if not PARTITIONED:
+        session.execute(insert(elo_history), records)
+        return
+
+    by_year: Dict[int, List[Dict[str, Any]]] = {}
+    for rec in records:
+        by_year.setdefault(rec['date'].year, []).append(rec)
+    ensure_partitions(session, set(by_year))
+    for year in sorted(by_year):
+        session.execute(insert(partition_for(year)), by_year[year])
+
+
+def write_current_elos(session, records: List[Dict[str, Any]], replace: bool = False) -> None:
+    """
+    Update gold.current_elo from history rows (which must carry wrestler_id).
+
+    replace=True rebuilds the table (full replay); otherwise each wrestler's
+    row is only overwritten by a rating from a later (date, match_id).
+    """
+    latest: Dict[int, Dict[str, Any]] = {}
+    for rec in sorted(records, key=lambda rec: (rec['date'], rec['match_id'])):
+        latest[rec['wrestler_id']] = rec
+    rows = [
+        {'wrestler_id': wid, 'wrestler': rec['wrestler'], 'elo': rec['elo_after'],
+         'date': rec['date'], 'match_id': rec['match_id']}
+        for wid, rec in latest.items()
+    ]
+
+    if replace:
+        session.execute(delete(current_elo))
+        if rows:
+            session.execute(insert(current_elo), rows)
+        return
+    if not rows:
+        return
+
+    stmt = pg_insert(current_elo) if engine.dialect.name.startswith("postg") else sqlite_insert(current_elo)
+    cur, new = current_elo.c, stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[cur.wrestler_id],
+        set_={'wrestler': new.wrestler, 'elo': new.elo, 'date': new.date, 'match_id': new.match_id},
+        where=or_(new.date > cur.date, and_(new.date == cur.date, new.match_id >= cur.match_id)),
+    )
+    session.execute(stmt, rows)
+
+
+def sync_wrestlers(session, records: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Make sure every wrestler in records has a silver.wrestlers_dim row and
+    widen first_seen/last_seen to cover the records' dates.
+
+    Returns:
+        {name: wrestler_id} for every name in records.
+    """
+    spans: Dict[str, Tuple[Any, Any]] = {}
+    for rec in records:
+        d = rec.get('date')
+        lo, hi = spans.get(rec['wrestler'], (d, d))
+        if d is not None:
+            lo = d if lo is None else min(lo, d)
+            hi = d if hi is None else max(hi, d)
+        spans[rec['wrestler']] = (lo, hi)
+
+    existing = dict(session.execute(
+        select(wrestlers_dim.c.name, wrestlers_dim.c.wrestler_id)
+    ).all())
+
+    missing = [
+        {'name': n, 'first_seen': lo, 'last_seen': hi, 'active': True}
+        for n, (lo, hi) in spans.items() if n not in existing
+    ]
+    if missing:
+        session.execute(insert(wrestlers_dim), missing)
+        existing = dict(session.execute(
+            select(wrestlers_dim.c.name, wrestlers_dim.c.wrestler_id)
+        ).all())
+
+    seen = [
+        {'wid': existing[n], 'lo': lo, 'hi': hi}
+        for n, (lo, hi) in spans.items() if lo is not None
+    ]
+    if seen:
+        dim = wrestlers_dim.c
+        session.execute(
+            update(wrestlers_dim)
+            .where(dim.wrestler_id == bindparam('wid'))
+            .values(
+                first_seen=case((or_(dim.first_seen.is_(None), dim.first_seen > bindparam('lo')), bindparam('lo')),
+                                else_=dim.first_seen),
+                last_seen=case((or_(dim.last_seen.is_(None), dim.last_seen < bindparam('hi')), bindparam('hi')),
+                               else_=dim.last_seen),
+            ),
+            seen,
+        )
+
+    return {n: existing[n] for n in spans}
+
+
+def refresh_elo_history(
+    records: List[Dict[str, Any]],
+    h2h_deltas: Optional[Dict[Tuple[str, str], Dict[str, Any]]] = None,
+) -> None:
     """
     Truncate the elo_history table and bulk‐insert the provided records.
+    Head-to-head deltas are applied in the same transaction so the two
+    tables never disagree about which matches have been processed.
     """
     session = SessionLocal()
     try:
-        # 1) remove all existing rows
+        # 1) resolve wrestler ids (creating dimension rows as needed)
+        ids = sync_wrestlers(session, records)
+        for rec in records:
+            rec['wrestler_id'] = ids[rec['wrestler']]
+
+        # 2) remove all existing rows
         session.execute(delete(elo_history))
 
-        # 2) insert fresh history
-        session.execute(insert(elo_history), records)
+        # 3) insert fresh history, partition by partition
+        write_elo_rows(session, records)
+        write_current_elos(session, records, replace=True)
+
+        # 4) fold newly processed matches into the pairwise aggregates
+        upsert_head_to_head(session, h2h_deltas or {})
         session.commit()
     finally:
         session.close()
 
 
+class EloEngine:
+    """
+    In-memory rating state for incremental (watch-mode) updates.
+
+    Seeded from gold.current_elo, then advanced one batch of
+    new matches at a time with the same update_elos used by the full replay.
+    """
+
+    def __init__(self, ratings: Optional[Dict[str, float]] = None) -> None:
+        self.ratings: Dict[str, float] = dict(ratings or {})
+
+    @classmethod
+    def from_db(cls, session=None) -> "EloEngine":
+        own = session is None
+        session = session or SessionLocal()
+        try:
+            # one row per wrestler — the same latest rating the leaderboard serves
+            rows = session.execute(select(current_elo.c.wrestler, current_elo.c.elo)).all()
+        finally:
+            if own:
+                session.close()
+        return cls({wrestler: elo for wrestler, elo in rows})
+
+    def apply(
+        self, df: pd.DataFrame
+    ) -> Tuple[List[Dict[str, Any]], Dict[Tuple[str, str], Dict[str, Any]], Dict[str, float]]:
+        """
+        Advance ratings by the matches in df (must carry 'date' and 'id').
+
+        Matches are applied in (date, id) order, exactly like the full replay,
+        whatever order they were scraped in.
+
+        Returns:
+            records: new elo_history rows.
+            h2h_deltas: head-to-head increments for these matches.
+            changed: {wrestler: new elo} for everyone who wrestled.
+        """
+        # newest→oldest, which update_elos / head_to_head_deltas walk in reverse
+        df = df.sort_values(['date', 'id'], ascending=False, kind='stable')
+        ratings, history = update_elos(df, self.ratings)
+        records = [rec for recs in history.values() for rec in recs]
+        h2h_deltas = head_to_head_deltas(df, history, set(int(i) for i in df['id']))
+        self.ratings = ratings
+        return records, h2h_deltas, {w: ratings[w] for w in history}
+
+
+def append_elo_history(
+    session,
+    records: List[Dict[str, Any]],
+    h2h_deltas: Optional[Dict[Tuple[str, str], Dict[str, Any]]] = None,
+) -> None:
+    """
+    Add new history rows and their head-to-head increments without touching
+    existing rows. The caller owns the transaction.
+    """
+    ids = sync_wrestlers(session, records)
+    for rec in records:
+        rec['wrestler_id'] = ids[rec['wrestler']]
+    write_elo_rows(session, records)
+    write_current_elos(session, records)
+    upsert_head_to_head(session, h2h_deltas or {})
+
+
+def replay_elo_history() -> Tuple[int, int, int]:
+    """
+    Full batch replay: recompute every rating from bronze in chronological
+    order, reload elo_history / current_elo and fold new matches into
+    head_to_head.
+
+    Matches are ordered by (date, id), the same order EloEngine.apply uses,
+    so a replay reproduces the ratings watch mode already published.
+
+    Returns:
+        (history rows written, head-to-head pairs updated, new matches).
+    """
+    # hold the writer lock from load to commit so a watch-mode poll can't
+    # land in between (its rows would be deleted but its head-to-head kept)
+    with elo_writer_lock():
+        # 1) load all matches from the DB, newest→oldest as update_elos expects
+        session = SessionLocal()
+        rows = session.execute(
+            select(matches).order_by(matches.c.date.desc(), matches.c.id.desc())
+        ).mappings().all()
+        session.close()
+
+        df = pd.DataFrame(rows)
+
+        # 2) compute ELOs & build history
+        _, history = update_elos(df)
+
+        # 3) flatten history into a list of dicts
+        hist_records: List[Dict[str, Any]] = []
+        for recs in history.values():
+            hist_records.extend(recs)
+
+        # 4) pairwise aggregates for matches not seen by a previous run
+        fresh_ids  = new_match_ids(df)
+        h2h_deltas = head_to_head_deltas(df, history, fresh_ids)
+
+        # 5) truncate & reload the elo_history table
+        refresh_elo_history(hist_records, h2h_deltas)
+
+    return len(hist_records), len(h2h_deltas), len(fresh_ids)
+
+
 if __name__ == "__main__":
     
     if engine.dialect.name.startswith("postg"):
@@ -115,24 +520,10 @@ if __name__ == "__main__":
             conn.execute(text("CREATE SCHEMA IF NOT EXISTS gold"))
 
     # Ensure all tables defined in models are present (incl. gold.elo_history)
+    ensure_elo_history_schema()
     metadata.create_all(engine)
     
-    # 1) load all matches from the DB
-    session = SessionLocal()
-    rows = session.execute(select(matches)).mappings().all()
-    session.close()
-
-    df = pd.DataFrame(rows)
-
-    # 2) compute ELOs & build history
-    _, history = update_elos(df)
-
-    # 3) flatten history into a list of dicts
-    hist_records: List[Dict[str, Any]] = []
-    for recs in history.values():
-        hist_records.extend(recs)
-
-    # 4) truncate & reload the elo_history table
-    refresh_elo_history(hist_records)
+    n_rows, n_pairs, n_new = replay_elo_history()
 
-    print(f"[INFO] Replaced elo_history with {len(hist_records)} rows.")
+    print(f"[INFO] Replaced elo_history with {n_rows} rows.")
+    print(f"[INFO] Updated {n_pairs} head-to-head pairs from {n_new} new matches.")
@@ -1,9 +1,13 @@
 # src/models.py
 
 from sqlalchemy import (
-    Table, Column, Integer, String, Date, Boolean, Float, ForeignKey, UniqueConstraint
+    Table, Column, Integer, String, Date, Boolean, Float, ForeignKey, UniqueConstraint, Index, func
 )
-from src.db import metadata
+from src.db import engine, metadata
+
+# Postgres gets a range-partitioned gold.elo_history (by year); partitioned
+# tables need the partition key in the primary key, so `date` joins `id` there.
+PARTITIONED = engine.dialect.name.startswith("postg")
 
 # -------------------------
 # BRONZE: raw scraped rows
@@ -31,6 +35,18 @@ matches_raw = Table(
     schema="bronze",
 )
 
+# NULL-safe natural key: the UniqueConstraint above treats NULL match types
+# as distinct, so it cannot stop duplicates of matches without one.
+matches_raw_natural_key = Index(
+    "uq_matches_raw_natural_key",
+    matches_raw.c.date,
+    matches_raw.c.show,
+    func.coalesce(matches_raw.c.match_type, ""),
+    matches_raw.c.winners,
+    matches_raw.c.losers,
+    unique=True,
+)
+
 # Back-compat alias: existing code importing `matches` keeps working
 matches = matches_raw
 
@@ -96,13 +112,56 @@ match_participants = Table(
 elo_history = Table(
     "elo_history",
     metadata,
-    Column("id",         Integer, primary_key=True, autoincrement=True),
-    Column("match_id",   Integer, ForeignKey("bronze.matches_raw.id", ondelete="CASCADE"), nullable=False, index=True),
-    Column("wrestler",   String,  nullable=False),   # keep string for v1; can migrate to wrestler_id later
-    Column("opponents",  String,  nullable=False),
-    Column("elo_before", Float,   nullable=False),
-    Column("elo_change", Float,   nullable=False),
-    Column("elo_after",  Float,   nullable=False),
-    Column("result",     String,  nullable=False),   # 'Win' or 'Loss' (or 'Draw')
+    Column("id",          Integer, primary_key=True, autoincrement=True),
+    Column("date",        Date,    primary_key=PARTITIONED, nullable=False),  # match date (partition key)
+    Column("match_id",    Integer, ForeignKey("bronze.matches_raw.id", ondelete="CASCADE"), nullable=False, index=True),
+    Column("wrestler_id", Integer, ForeignKey("silver.wrestlers_dim.wrestler_id", ondelete="RESTRICT"), nullable=False),
+    Column("wrestler",    String,  nullable=False),   # display name, kept alongside wrestler_id
+    Column("opponents",   String,  nullable=False),
+    Column("elo_before",  Float,   nullable=False),
+    Column("elo_change",  Float,   nullable=False),
+    Column("elo_after",   Float,   nullable=False),
+    Column("result",      String,  nullable=False),   # 'Win' or 'Loss' (or 'Draw')
+    # the writer inserts in (date, match_id) order → BRIN ranges stay narrow
+    Index("ix_elo_history_date_brin", "date", postgresql_using="brin"),
+    Index("ix_elo_history_wrestler_id_date_id", "wrestler_id", "date", "id"),
+    schema="gold",
+    postgresql_partition_by="RANGE (date)",
+    # never reuse ids after a reload: max(id) is the data-generation marker
+    sqlite_autoincrement=True,
+)
+
+# Each wrestler's latest rating, maintained by the Elo writers alongside
+# elo_history so leaderboards read one row per wrestler, not the history.
+current_elo = Table(
+    "current_elo",
+    metadata,
+    Column("wrestler_id", Integer, ForeignKey("silver.wrestlers_dim.wrestler_id", ondelete="CASCADE"), primary_key=True),
+    Column("wrestler",    String,  nullable=False),
+    Column("elo",         Float,   nullable=False),   # elo_after of the latest match
+    Column("date",        Date,    nullable=False),   # date of that match
+    Column("match_id",    Integer, nullable=False),
+    Index("ix_current_elo_elo", "elo"),
+    schema="gold",
+)
+
+
+# Pairwise rivalry aggregates, one row per unordered pair of opponents.
+# Pairs are stored canonically with wrestler_a < wrestler_b so a lookup for
+# either ordering is a single primary-key probe; stats are from A's side.
+head_to_head = Table(
+    "head_to_head",
+    metadata,
+    Column("wrestler_a",    String,  primary_key=True),
+    Column("wrestler_b",    String,  primary_key=True),
+    Column("meetings",      Integer, nullable=False, default=0),
+    Column("wins_a",        Integer, nullable=False, default=0),   # = losses for B
+    Column("wins_b",        Integer, nullable=False, default=0),   # = losses for A
+    Column("net_elo_a",     Float,   nullable=False, default=0.0), # Elo A gained/lost against B
+    Column("net_elo_b",     Float,   nullable=False, default=0.0), # Elo B gained/lost against A
+    Column("last_match_id", Integer, ForeignKey("bronze.matches_raw.id", ondelete="SET NULL"), nullable=True),
+    Column("last_date",     Date,    nullable=True),
+    Index("ix_head_to_head_wrestler_b", "wrestler_b"),
+    Index("ix_head_to_head_meetings", "meetings"),
     schema="gold",
 )
@@ -1,5 +1,6 @@
 # src/scraper.py
 
+import os
 import requests
 from bs4 import BeautifulSoup
 import pandas as pd
@@ -7,10 +8,10 @@ import re
 from datetime import datetime
 from typing import Optional, List, Dict
 
-from sqlalchemy import select, insert, text
+from sqlalchemy import select, insert, update, delete, text, func
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from src.db import engine, SessionLocal, metadata
-from src.models import matches_raw as matches
+from src.models import matches_raw as matches, matches_raw_natural_key, head_to_head
 
 # Ensure schemas exist before creating tables
 if engine.dialect.name.startswith("postg"):
@@ -20,10 +21,54 @@ if engine.dialect.name.startswith("postg"):
         conn.execute(text("CREATE SCHEMA IF NOT EXISTS gold"))
 
 
+
+
+def ensure_matches_natural_key() -> None:
+    """
+    One-time bronze cleanup before the NULL-safe natural key index exists.
+
+    Older scrapes stored missing match types / times as the text 'NaN'. They
+    become NULL, and duplicate rows that then share a natural key are
+    dropped (lowest id kept). If any were dropped, head_to_head is cleared
+    so the next Elo replay rebuilds it without the double-counted matches.
+    """
+    # expression indexes aren't reflected everywhere → ask the catalog directly
+    if engine.dialect.name.startswith("postg"):
+        exists = text("SELECT 1 FROM pg_indexes WHERE schemaname = 'bronze' AND indexname = :name")
+    else:
+        exists = text("SELECT 1 FROM bronze.sqlite_master WHERE type = 'index' AND name = :name")
+    with engine.connect() as conn:
+        if conn.execute(exists, {"name": matches_raw_natural_key.name}).first():
+            return
+
+    with engine.begin() as conn:
+        for col in (matches.c.match_type, matches.c.time):
+            conn.execute(update(matches).where(col == 'NaN').values({col.name: None}))
+
+        keep = (
+            select(func.min(matches.c.id))
+            .group_by(
+                matches.c.date,
+                matches.c.show,
+                func.coalesce(matches.c.match_type, ''),
+                matches.c.winners,
+                matches.c.losers,
+            )
+        )
+        removed = conn.execute(delete(matches).where(matches.c.id.not_in(keep))).rowcount
+        if removed:
+            conn.execute(delete(head_to_head))
+            print(f"[INFO] Removed {removed} duplicate matches; head_to_head will be rebuilt")
+
+        matches_raw_natural_key.create(conn)
+
+
 # Now create tables in their schemas
 metadata.create_all(engine)
+ensure_matches_natural_key()
 
-BASE_URL = "https://www.cagematch.net/?id=8&nr=1&page=8"
+# overridable so a local fixture server can stand in for Cagematch
+BASE_URL = os.getenv("CAGEMATCH_URL", "https://www.cagematch.net/?id=8&nr=1&page=8")
 
 
 def extract_match_time(text: str) -> Optional[str]:
@@ -74,88 +119,99 @@ def detect_ple(show: Optional[str]) -> bool:
     return bool(show and 'premium live event' in show.lower())
 
 
-def scrape_matches() -> pd.DataFrame:
+def parse_results_page(html: str) -> List[Dict]:
+    """
+    Parse one Cagematch results page into raw match records (newest first).
+    """
     records: List[Dict] = []
 
-    for offset in range(0, 1000, 100):
-        url = f"{BASE_URL}&s={offset}" if offset else BASE_URL
-        print(url)
-        resp = requests.get(url)
-        if resp.status_code != 200:
-            print(f"  → Failed to fetch: {resp.status_code}")
+    soup = BeautifulSoup(html, 'html.parser')
+    for qr in soup.select('div.QuickResults'):
+        header = qr.find('div', class_='QuickResultsHeader')
+        if not header:
             continue
+        header_txt = header.get_text(" ", strip=True)
 
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        for qr in soup.select('div.QuickResults'):
-            header = qr.find('div', class_='QuickResultsHeader')
-            if not header:
-                continue
-            header_txt = header.get_text(" ", strip=True)
+        # Skip House Shows / LFG
+        if re.search(r'\b(house show|lfg)\b', header_txt, re.IGNORECASE):
+            continue
 
-            # Skip House Shows / LFG
-            if re.search(r'\b(house show|lfg)\b', header_txt, re.IGNORECASE):
-                continue
+        info = parse_header(header_txt)
+        show_el = header.find('a')
+        show = show_el.get_text(strip=True) if show_el else None
 
-            info = parse_header(header_txt)
-            show_el = header.find('a')
-            show = show_el.get_text(strip=True) if show_el else None
+        # Skip “WWE Speed” or “WWE Main Event”
+        if show and re.match(r'(?i)^wwe speed\b', show):
+            continue
+        if show and re.match(r'(?i)^wwe main event\b', show):
+            continue
+
+        info['Show'] = show
+        info['Premium Live Event'] = detect_ple(show)
+
+        ul = header.find_next_sibling('ul')
+        if not ul:
+            continue
 
-            # Skip “WWE Speed” or “WWE Main Event”
-            if show and re.match(r'(?i)^wwe speed\b', show):
+        for li in ul.find_all('li'):
+            mt_el = li.find('span', class_='MatchType')
+            mtype = mt_el.get_text(" ", strip=True).rstrip(':') if mt_el else None
+            # Skip dark matches
+            if mtype and re.search(r'\bdark\b', mtype, re.IGNORECASE):
                 continue
-            if show and re.match(r'(?i)^wwe main event\b', show):
+
+            mr_el = li.find('span', class_='MatchResults')
+            if not mr_el:
                 continue
+            full = mr_el.get_text(" ", strip=True)
 
-            info['Show'] = show
-            info['Premium Live Event'] = detect_ple(show)
+            time    = extract_match_time(full)
+            finish  = determine_finish(full)
+            tchange = detect_title_change(full)
 
-            ul = header.find_next_sibling('ul')
-            if not ul:
+            parts = re.split(r' defeat[s]? ', full, maxsplit=1)
+            if len(parts) != 2:
                 continue
+            win_raw, loss_raw = parts
+            
+            # remove any “ by DQ”, “ by submission”, etc.
+            loss_raw = re.sub(r'\s+by\s+\w+.*$', '', loss_raw, flags=re.IGNORECASE)
+
+            # Strip championship flags, match times, managers, title change markers
+            for patt in [r'\(c\)', r'\(\d{1,2}:\d{2}\)', r'\(w/.*?\)', r'- TITLE CHANGE !!!']:
+                win_raw  = re.sub(patt, '', win_raw)
+                loss_raw = re.sub(patt, '', loss_raw)
+
+            winners = replace_and_symbols(win_raw).strip()
+            losers  = replace_and_symbols(loss_raw).strip()
+
+            records.append({
+                'Date':               info['Date'],
+                'Show':               info['Show'],
+                'Premium Live Event': info['Premium Live Event'],
+                'Match Type':         mtype,
+                'Winners':            winners,
+                'Losers':             losers,
+                'Time':               time,
+                'Finish':             finish,
+                'Title Change':       tchange,
+            })
+
+    return records
+
 
-            for li in ul.find_all('li'):
-                mt_el = li.find('span', class_='MatchType')
-                mtype = mt_el.get_text(" ", strip=True).rstrip(':') if mt_el else None
-                # Skip dark matches
-                if mtype and re.search(r'\bdark\b', mtype, re.IGNORECASE):
-                    continue
-
-                mr_el = li.find('span', class_='MatchResults')
-                if not mr_el:
-                    continue
-                full = mr_el.get_text(" ", strip=True)
-
-                time    = extract_match_time(full)
-                finish  = determine_finish(full)
-                tchange = detect_title_change(full)
-
-                parts = re.split(r' defeat[s]? ', full, maxsplit=1)
-                if len(parts) != 2:
-                    continue
-                win_raw, loss_raw = parts
-                
-                # remove any “ by DQ”, “ by submission”, etc.
-                loss_raw = re.sub(r'\s+by\s+\w+.*$', '', loss_raw, flags=re.IGNORECASE)
-
-                # Strip championship flags, match times, managers, title change markers
-                for patt in [r'\(c\)', r'\(\d{1,2}:\d{2}\)', r'\(w/.*?\)', r'- TITLE CHANGE !!!']:
-                    win_raw  = re.sub(patt, '', win_raw)
-                    loss_raw = re.sub(patt, '', loss_raw)
-
-                winners = replace_and_symbols(win_raw).strip()
-                losers  = replace_and_symbols(loss_raw).strip()
-
-                records.append({
-                    'Date':               info['Date'],
-                    'Show':               info['Show'],
-                    'Premium Live Event': info['Premium Live Event'],
-                    'Match Type':         mtype,
-                    'Winners':            winners,
-                    'Losers':             losers,
-                    'Time':               time,
-                    'Finish':             finish,
-                    'Title Change':       tchange,
-                })
+def scrape_matches() -> pd.DataFrame:
+    records: List[Dict] = []
+
+    for offset in range(0, 1000, 100):
+        url = f"{BASE_URL}&s={offset}" if offset else BASE_URL
+        print(url)
+        resp = requests.get(url)
+        if resp.status_code != 200:
+            print(f"  → Failed to fetch: {resp.status_code}")
+            continue
+
+        records.extend(parse_results_page(resp.text))
 
     return pd.DataFrame(records)
 
@@ -299,13 +355,13 @@ def refresh_matches(records: List[Dict]) -> None:
 
 
 
-if __name__ == "__main__":
-    # 1. Scrape into DataFrame
-    df = scrape_matches()
+def prepare_records(df: pd.DataFrame) -> List[Dict]:
+    """
+    Clean scraped rows, derive flags and rename to the bronze column names.
+    """
     df['Date'] = pd.to_datetime(df['Date'], errors='coerce').dt.date
 
-
-    # 2. Clean & derive
+    # Clean & derive
     df = split_tag_teams_from_columns(df)
     df['Winners']       = df['Winners'].apply(clean_column)
     df['Losers']        = df['Losers'].apply(clean_column)
@@ -315,8 +371,7 @@ if __name__ == "__main__":
     mask = df['Match Type'].str.contains('tornado tag', case=False, na=False)
     df.loc[mask, 'Multi-Man'] = False
 
-
-    # 3. Rename to match your SQLAlchemy columns
+    # Rename to match your SQLAlchemy columns
     df_db = df.rename(columns={
         'Date':               'date',
         'Show':               'show',
@@ -332,10 +387,15 @@ if __name__ == "__main__":
         'Category':           'category',
     })
 
-    records = df_db.to_dict(orient="records")
-    refresh_matches(records)
-    
+    # missing values (no MatchType span, no time, …) become NULL, not 'NaN'
+    df_db = df_db.astype(object).where(df_db.notna(), None)
+    return df_db.to_dict(orient="records")
 
 
+if __name__ == "__main__":
+    # 1. Scrape into DataFrame
+    df = scrape_matches()
 
-   
+    # 2. Clean, derive & rename to bronze columns
+    records = prepare_records(df)
+    refresh_matches(records)
@@ -0,0 +1,209 @@
+# src/search.py
+
+import threading
+import time
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select, func
+from src.models import elo_history, current_elo
+
+NGRAM_SIZE      = 3
+MAX_PER_NODE    = 50     # ids kept per trie node (already in Elo order)
+FUZZY_THRESHOLD = 0.3    # minimum Dice similarity on character n-grams
+REFRESH_SECONDS = 30     # how often the live index checks the data generation
+
+
+def normalize(name: str) -> str:
+    """
+    Lowercase, strip accents and collapse whitespace so 'Rey Mistério' ~ 'rey misterio'.
+    """
+    decomposed = unicodedata.normalize("NFKD", name)
+    ascii_only = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(ascii_only.lower().split())
+
+
+def ngrams(text: str, n: int = NGRAM_SIZE) -> Set[str]:
+    padded = f" {text} "
+    if len(padded) <= n:
+        return {padded}
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+class _TrieNode:
+    __slots__ = ("children", "ids")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.ids: List[int] = []
+
+
+class SearchIndex:
+    """
+    Immutable in-memory name index: prefix tries over full names/aliases and
+    over individual name tokens, plus a character n-gram index for typos.
+
+    Entries are ranked by current Elo; they are inserted in that order so every
+    trie node's id list is already sorted and a prefix lookup is a walk of
+    len(query) nodes followed by a slice.
+    """
+
+    def __init__(
+        self,
+        entries: Iterable[Tuple[str, float]],
+        aliases: Optional[Dict[str, List[str]]] = None,
+        generation: Optional[int] = None,
+    ) -> None:
+        ranked = sorted(entries, key=lambda e: e[1], reverse=True)
+        self.names: List[str]  = [name for name, _ in ranked]
+        self.elos:  List[float] = [elo for _, elo in ranked]
+        self.generation = generation
+
+        self._names  = _TrieNode()   # full names + aliases
+        self._tokens = _TrieNode()   # later words of each name/alias ("rhodes")
+        # n-gram postings point at "keys" (a full name/alias or one of its
+        # words) so a typo in a surname still scores against the surname alone
+        self._grams: Dict[str, List[int]] = {}
+        self._keys: List[Tuple[int, int]] = []   # key id -> (entry idx, n-gram count)
+
+        aliases = aliases or {}
+        for idx, name in enumerate(self.names):
+            keys = {normalize(k) for k in [name, *aliases.get(name, [])] if k}
+            words: Set[str] = set()
+            for key in keys:
+                self._insert(self._names, key, idx)
+                for token in key.split()[1:]:
+                    self._insert(self._tokens, token, idx)
+                words.update(key.split())
+            for key in keys | words:
+                grams = ngrams(key)
+                for g in grams:
+                    self._grams.setdefault(g, []).append(len(self._keys))
+                self._keys.append((idx, len(grams)))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @staticmethod
+    def _insert(root: _TrieNode, key: str, idx: int) -> None:
+        node = root
+        for ch in key:
+            node = node.children.setdefault(ch, _TrieNode())
+            if len(node.ids) < MAX_PER_NODE and (not node.ids or node.ids[-1] != idx):
+                node.ids.append(idx)
+
+    @staticmethod
+    def _prefix(root: _TrieNode, key: str) -> List[int]:
+        node = root
+        for ch in key:
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        return node.ids
+
+    def _fuzzy(self, key: str) -> List[int]:
+        query = ngrams(key)
+        hits: Dict[int, int] = {}
+        for g in query:
+            for key_id in self._grams.get(g, ()):
+                hits[key_id] = hits.get(key_id, 0) + 1
+
+        # best-matching key per entry
+        best: Dict[int, float] = {}
+        for key_id, count in hits.items():
+            idx, n_grams = self._keys[key_id]
+            score = 2 * count / (len(query) + n_grams)
+            if score > best.get(idx, 0.0):
+                best[idx] = score
+        scored = [(score, idx) for idx, score in best.items() if score >= FUZZY_THRESHOLD]
+        # best similarity first; ties fall back to Elo rank (lower idx)
+        scored.sort(key=lambda s: (-s[0], s[1]))
+        return [idx for _, idx in scored]
+
+    def search(self, query: str, limit: int = 10) -> List[Dict]:
+        """
+        Full-name prefix matches first, then word-prefix matches, then fuzzy
+        n-gram matches; each tier is ordered by current Elo.
+        """
+        key = normalize(query)
+        if not key:
+            return []
+
+        results: List[Dict] = []
+        seen: Set[int] = set()
+
+        def take(ids: Iterable[int], match: str) -> None:
+            for idx in ids:
+                if len(results) >= limit:
+                    return
+                if idx in seen:
+                    continue
+                seen.add(idx)
+                results.append({"wrestler": self.names[idx], "elo": self.elos[idx], "match": match})
+
+        take(self._prefix(self._names, key), "prefix")
+        take(self._prefix(self._tokens, key), "token")
+        if len(results) < limit:
+            take(self._fuzzy(key), "fuzzy")
+        return results
+
+
+def data_generation(session) -> Optional[int]:
+    """
+    Cheap change marker for gold.elo_history: the Elo job reloads every row,
+    so the max primary key moves on each run (and on every appended row).
+    Ids are never reused: a Postgres sequence, AUTOINCREMENT on SQLite.
+    """
+    return session.execute(select(func.max(elo_history.c.id))).scalar()
+
+
+def build_index(session) -> SearchIndex:
+    """
+    Build a SearchIndex from gold.current_elo, the same per-wrestler latest
+    rating the leaderboards and the watch-mode EloEngine use.
+    """
+    generation = data_generation(session)
+    rows = session.execute(select(current_elo.c.wrestler, current_elo.c.elo)).all()
+    return SearchIndex(((r[0], r[1]) for r in rows), generation=generation)
+
+
+class LiveSearchIndex:
+    """
+    Process-wide holder that hot-swaps the SearchIndex when the data changes.
+
+    At most once every `refresh_seconds` a request checks the data generation;
+    if it moved, that request rebuilds the index and swaps the reference.
+    Concurrent requests keep answering from the previous index meanwhile.
+    """
+
+    def __init__(self, refresh_seconds: float = REFRESH_SECONDS) -> None:
+        self.refresh_seconds = refresh_seconds
+        self._index: Optional[SearchIndex] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        """Force a generation check on the next request."""
+        self._checked_at = 0.0
+
+    def get(self, session) -> SearchIndex:
+        index = self._index
+        due = time.monotonic() - self._checked_at >= self.refresh_seconds
+        if index is not None and not due:
+            return index
+
+        # only one request refreshes; others use what we have (if anything)
+        if not self._lock.acquire(blocking=index is None):
+            return index
+        try:
+            if self._index is not None and time.monotonic() - self._checked_at < self.refresh_seconds:
+                return self._index
+            if self._index is None or data_generation(session) != self._index.generation:
+                self._index = build_index(session)
+            self._checked_at = time.monotonic()
+            return self._index
+        finally:
+            self._lock.release()
+
+
+live_index = LiveSearchIndex()
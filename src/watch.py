@@ -0,0 +1,146 @@
+# src/watch.py
+
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+import requests
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from src.db import SessionLocal, engine, elo_writer_lock
+from src.models import matches_raw as matches
+from src.scraper import BASE_URL, parse_results_page, prepare_records
+from src.elo import EloEngine, append_elo_history
+from src.search import data_generation
+
+# seconds between polls of the first results page; 0 disables watch mode
+WATCH_INTERVAL = int(os.getenv("WATCH_INTERVAL", "0"))
+REQUEST_TIMEOUT = 30
+
+
+class Watcher:
+    """
+    Polls the first Cagematch results page and applies only unseen matches.
+
+    Each poll inserts the new bronze rows, advances the in-memory EloEngine,
+    and appends the matching elo_history / head_to_head rows in a single
+    transaction. The rating state is rolled back if that commit fails.
+
+    Polls hold the Elo writer lock, so they never interleave with a batch
+    replay. When the data generation moved since our last commit (a batch run
+    rewrote elo_history), ratings are reloaded before applying new matches.
+    """
+
+    def __init__(self, url: str = BASE_URL, elo: Optional[EloEngine] = None) -> None:
+        self.url = url
+        session = SessionLocal()
+        try:
+            self.generation = data_generation(session)
+            self.elo = elo if elo is not None else EloEngine.from_db(session)
+        finally:
+            session.close()
+
+    def fetch(self) -> List[Dict[str, Any]]:
+        resp = requests.get(self.url, timeout=REQUEST_TIMEOUT)
+        if resp.status_code != 200:
+            print(f"[WARN] Failed to fetch {self.url}: {resp.status_code}")
+            return []
+        rows = parse_results_page(resp.text)
+        if not rows:
+            return []
+        return [r for r in prepare_records(pd.DataFrame(rows)) if r['date'] is not None]
+
+    def poll_once(self) -> Optional[Dict[str, Any]]:
+        """
+        Run one poll. Returns an update payload, or None if nothing was new.
+        """
+        records = self.fetch()
+        if not records:
+            return None
+
+        with elo_writer_lock():
+            session = SessionLocal()
+            try:
+                # natural keys already stored for the dates on this page
+                existing = set(session.execute(
+                    select(
+                        matches.c.date,
+                        matches.c.show,
+                        matches.c.match_type,
+                        matches.c.winners,
+                        matches.c.losers,
+                    ).where(matches.c.date >= min(r['date'] for r in records))
+                ).all())
+
+                # a row that slipped past the key check (e.g. inserted by the batch
+                # scraper meanwhile) is skipped instead of aborting the whole poll
+                insert_stmt = pg_insert if engine.dialect.name.startswith("postg") else sqlite_insert
+
+                new_recs: List[Dict[str, Any]] = []
+                for r in records:
+                    key = (r['date'], r['show'], r['match_type'], r['winners'], r['losers'])
+                    if key in existing:
+                        continue
+                    existing.add(key)
+                    match_id = session.execute(
+                        insert_stmt(matches).values(**r)
+                        .on_conflict_do_nothing()
+                        .returning(matches.c.id)
+                    ).scalar()
+                    if match_id is None:
+                        continue
+                    r['id'] = match_id
+                    new_recs.append(r)
+
+                if not new_recs:
+                    return None
+
+                # a batch replay rewrote history since our last commit → resync
+                if data_generation(session) != self.generation:
+                    self.elo = EloEngine.from_db(session)
+
+                # applied in (date, id) order, the same order as the batch replay
+                previous = dict(self.elo.ratings)
+                hist_records, h2h_deltas, changed = self.elo.apply(pd.DataFrame(new_recs))
+                try:
+                    append_elo_history(session, hist_records, h2h_deltas)
+                    session.commit()
+                    self.generation = data_generation(session)
+                except Exception:
+                    self.elo.ratings = previous
+                    raise
+            finally:
+                session.close()
+
+        deltas: Dict[str, float] = {}
+        for rec in hist_records:
+            deltas[rec['wrestler']] = deltas.get(rec['wrestler'], 0.0) + rec['elo_change']
+
+        return {
+            "matches": [
+                {k: r[k] for k in ('id', 'date', 'show', 'match_type', 'winners', 'losers')}
+                for r in new_recs
+            ],
+            "ratings": [
+                {"wrestler": w, "elo": elo, "change": deltas[w]}
+                for w, elo in sorted(changed.items(), key=lambda kv: kv[1], reverse=True)
+            ],
+        }
+
+
+if __name__ == "__main__":
+    watcher = Watcher()
+    interval = WATCH_INTERVAL or 60
+    print(f"[INFO] Watching {watcher.url} every {interval}s")
+    while True:
+        try:
+            update = watcher.poll_once()
+            if update:
+                print(f"[INFO] Applied {len(update['matches'])} new matches, "
+                      f"{len(update['ratings'])} ratings updated")
+        except Exception as exc:
+            print(f"[WARN] Poll failed: {exc}")
+        time.sleep(interval)
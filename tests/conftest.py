@@ -0,0 +1,30 @@
+import os
+import tempfile
+
+# point the app at a throwaway SQLite DB before anything imports src.db
+_DB_DIR = tempfile.mkdtemp(prefix="wwe-elo-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'main.db')}"
+
+import pytest
+from sqlalchemy import delete, event
+
+from src.db import engine, metadata
+
+
+@event.listens_for(engine, "connect")
+def _attach_schemas(dbapi_conn, _):
+    # SQLite has no schemas; emulate bronze/silver/gold with attached DBs
+    for schema in ("bronze", "silver", "gold"):
+        path = os.path.join(_DB_DIR, f"{schema}.db")
+        dbapi_conn.execute(f"ATTACH DATABASE '{path}' AS {schema}")
+
+
+@pytest.fixture(autouse=True)
+def clean_db():
+    import src.models  # noqa: F401  (registers tables on metadata)
+
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        for table in reversed(metadata.sorted_tables):
+            conn.execute(delete(table))
+    yield
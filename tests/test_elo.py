@@ -0,0 +1,165 @@
+import datetime
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, select
+
+from src.api.main import app
+from src.db import SessionLocal, engine
+from src.elo import EloEngine, append_elo_history, replay_elo_history, upsert_head_to_head
+from src.models import current_elo, elo_history, head_to_head, matches_raw
+
+client = TestClient(app)
+
+
+def match(day: int, winners: str, losers: str, show: str = "WWE Monday Night RAW") -> dict:
+    return {
+        'date': datetime.date(2025, 1, day), 'show': show, 'ple': False,
+        'match_type': "Singles Match", 'winners': winners, 'losers': losers,
+        'time': None, 'finish': "Pinfall", 'title_change': False,
+        'multi_man': False, 'stipulation': False, 'category': None,
+    }
+
+
+def add_matches(*recs) -> list:
+    with engine.begin() as conn:
+        return [conn.execute(insert(matches_raw).values(**r).returning(matches_raw.c.id)).scalar()
+                for r in recs]
+
+
+def ratings() -> dict:
+    with engine.connect() as conn:
+        return dict(conn.execute(select(current_elo.c.wrestler, current_elo.c.elo)).all())
+
+
+def pair(a: str, b: str) -> dict:
+    with engine.connect() as conn:
+        return dict(conn.execute(select(head_to_head).where(
+            head_to_head.c.wrestler_a == a, head_to_head.c.wrestler_b == b)).mappings().one())
+
+
+def net_elo(wrestler: str, match_ids: list) -> float:
+    with engine.connect() as conn:
+        return sum(conn.execute(select(elo_history.c.elo_change).where(
+            elo_history.c.wrestler == wrestler, elo_history.c.match_id.in_(match_ids))).scalars())
+
+
+def replay() -> dict:
+    replay_elo_history()
+    return ratings()
+
+
+def test_leaderboard_tracks_latest_rating_after_replay_and_append():
+    add_matches(match(3, "Cody Rhodes", "Kevin Owens"), match(6, "Kevin Owens", "Cody Rhodes"))
+    expected = replay()
+
+    top = client.get("/elo/top").json()
+    assert [r["wrestler"] for r in top] == sorted(expected, key=expected.get, reverse=True)
+    assert {r["wrestler"]: r["elo"] for r in top} == pytest.approx(expected)
+
+    # watch-mode style append on top of the replayed state
+    new = match(10, "Cody Rhodes", "Roman Reigns")
+    new['id'] = add_matches(new)[0]
+    elo = EloEngine.from_db()
+    records, deltas, _ = elo.apply(pd.DataFrame([new]))
+    session = SessionLocal()
+    try:
+        append_elo_history(session, records, deltas)
+        session.commit()
+    finally:
+        session.close()
+
+    current = {r["wrestler"]: r["elo"] for r in client.get("/elo/current", params={"limit": 10}).json()}
+    assert current == pytest.approx(elo.ratings)
+    assert client.get("/elo/current", params={"name": "reigns"}).json()[0]["wrestler"] == "Roman Reigns"
+
+
+def test_search_ranks_by_leaderboard_rating():
+    from src.search import build_index
+
+    add_matches(match(3, "Cody Rhodes", "Kevin Owens"), match(6, "Kevin Owens", "Cody Rhodes"),
+                match(6, "Kevin Owens", "Karrion Kross", show="WWE Friday Night SmackDown"))
+    replay()
+
+    session = SessionLocal()
+    try:
+        results = build_index(session).search("k")
+    finally:
+        session.close()
+    top = {r["wrestler"]: r["elo"] for r in client.get("/elo/top").json()}
+    assert [r["wrestler"] for r in results] == ["Kevin Owens", "Karrion Kross"]
+    assert {r["wrestler"]: r["elo"] for r in results} == pytest.approx({w: top[w] for w in ("Kevin Owens", "Karrion Kross")})
+
+
+def test_head_to_head_is_backfilled_then_extended_without_double_counting():
+    ids = add_matches(match(3, "Cody Rhodes", "Kevin Owens"), match(6, "Kevin Owens", "Cody Rhodes"))
+
+    # first run: head_to_head is empty, so every match is folded in
+    assert replay_elo_history() == (4, 1, 2)
+    row = pair("Cody Rhodes", "Kevin Owens")
+    assert (row["meetings"], row["wins_a"], row["wins_b"]) == (2, 1, 1)
+    assert (row["last_date"], row["last_match_id"]) == (datetime.date(2025, 1, 6), ids[1])
+    assert row["net_elo_a"] == pytest.approx(net_elo("Cody Rhodes", ids))
+    assert row["net_elo_b"] == pytest.approx(net_elo("Kevin Owens", ids))
+
+    # second run: only the extra match is added on top of the stored pair
+    ids += add_matches(match(10, "Cody Rhodes", "Kevin Owens"))
+    assert replay_elo_history() == (6, 1, 1)
+    row = pair("Cody Rhodes", "Kevin Owens")
+    assert (row["meetings"], row["wins_a"], row["wins_b"]) == (3, 2, 1)
+    assert (row["last_date"], row["last_match_id"]) == (datetime.date(2025, 1, 10), ids[2])
+    assert row["net_elo_a"] == pytest.approx(net_elo("Cody Rhodes", ids))
+
+    # nothing new: the aggregates stay put
+    assert replay_elo_history() == (6, 0, 0)
+    assert pair("Cody Rhodes", "Kevin Owens") == row
+
+    # the endpoint answers from either wrestler's perspective
+    kevin = client.get("/elo/head-to-head", params={"a": "Kevin Owens", "b": "Cody Rhodes"}).json()
+    assert (kevin["meetings"], kevin["wins"], kevin["losses"]) == (3, 1, 2)
+    assert kevin["net_elo"] == pytest.approx(row["net_elo_b"])
+    assert kevin["opponent_net_elo"] == pytest.approx(row["net_elo_a"])
+    cody = client.get("/elo/head-to-head", params={"a": "Cody Rhodes", "b": "Kevin Owens"}).json()
+    assert (cody["wins"], cody["losses"], cody["net_elo"]) == (2, 1, pytest.approx(row["net_elo_a"]))
+
+    assert client.get("/elo/head-to-head", params={"a": "Cody Rhodes", "b": "Cody Rhodes"}).status_code == 400
+    assert client.get("/elo/head-to-head", params={"a": "Cody Rhodes", "b": "Roman Reigns"}).status_code == 404
+
+
+def test_head_to_head_last_meeting_prefers_later_match_on_same_date():
+    ids = add_matches(match(6, "Cody Rhodes", "Kevin Owens"),
+                      match(6, "Kevin Owens", "Cody Rhodes", show="WWE Friday Night SmackDown"))
+    replay_elo_history()
+    assert pair("Cody Rhodes", "Kevin Owens")["last_match_id"] == ids[1]
+
+
+def test_upsert_head_to_head_adds_counts_and_keeps_latest_meeting():
+    ids = add_matches(match(3, "Cody Rhodes", "Kevin Owens"), match(6, "Cody Rhodes", "Kevin Owens"),
+                      match(6, "Kevin Owens", "Cody Rhodes"))
+
+    def delta(i: int, day: int, wins_a: int, wins_b: int) -> dict:
+        return {('Cody Rhodes', 'Kevin Owens'): {
+            'meetings': wins_a + wins_b, 'wins_a': wins_a, 'wins_b': wins_b,
+            'net_elo_a': 8.0 * (wins_a - wins_b), 'net_elo_b': 8.0 * (wins_b - wins_a),
+            'last_match_id': ids[i], 'last_date': datetime.date(2025, 1, day),
+        }}
+
+    session = SessionLocal()
+    try:
+        upsert_head_to_head(session, delta(1, 6, 1, 0))
+        upsert_head_to_head(session, delta(0, 3, 1, 0))   # older meeting: counts only
+        session.commit()
+        row = pair("Cody Rhodes", "Kevin Owens")
+        assert (row["meetings"], row["wins_a"], row["wins_b"]) == (2, 2, 0)
+        assert row["net_elo_a"] == pytest.approx(16.0)
+        assert (row["last_date"], row["last_match_id"]) == (datetime.date(2025, 1, 6), ids[1])
+
+        upsert_head_to_head(session, delta(2, 6, 0, 1))   # same date: the newer delta wins
+        session.commit()
+    finally:
+        session.close()
+    row = pair("Cody Rhodes", "Kevin Owens")
+    assert (row["meetings"], row["wins_a"], row["wins_b"]) == (3, 2, 1)
+    assert row["net_elo_b"] == pytest.approx(-8.0)
+    assert row["last_match_id"] == ids[2]
@@ -0,0 +1,237 @@
+import asyncio
+import datetime
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from src.db import engine
+from src.models import current_elo, elo_history, head_to_head, matches_raw
+from src.scraper import parse_results_page, prepare_records
+from src.elo import replay_elo_history
+from src.watch import Watcher
+
+RESULTS_PAGE = (Path(__file__).parent / "fixtures" / "results.html").read_text()
+EMPTY_PAGE   = "<html><body></body></html>"
+
+
+class _FixtureSite(BaseHTTPRequestHandler):
+    page = EMPTY_PAGE
+
+    def do_GET(self):
+        body = self.page.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def site():
+    """Local stand-in for the Cagematch results page."""
+    handler = type("Handler", (_FixtureSite,), {"page": RESULTS_PAGE})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    handler.url = f"http://127.0.0.1:{server.server_port}/?id=8&nr=1&page=8"
+    yield handler
+    server.shutdown()
+    server.server_close()
+
+
+def count(table) -> int:
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(table)).scalar()
+
+
+def test_first_poll_inserts_only_unseen_matches(site):
+    records = prepare_records(pd.DataFrame(parse_results_page(RESULTS_PAGE)))
+    already = records[-1]   # the SmackDown match was scraped before
+    with engine.begin() as conn:
+        conn.execute(insert(matches_raw), [already])
+
+    update = Watcher(url=site.url).poll_once()
+
+    assert update is not None
+    assert len(update["matches"]) == len(records) - 1
+    assert (already["show"], already["date"]) not in {(m["show"], m["date"]) for m in update["matches"]}
+    assert count(matches_raw) == len(records)
+    # 1v1 + 1v1 + 2v2 → 2 + 2 + 4 history rows and 1 + 1 + 4 rivalry pairs
+    assert count(elo_history) == 8
+    assert count(head_to_head) == 6
+
+
+def test_repeat_poll_is_noop(site):
+    watcher = Watcher(url=site.url)
+    assert watcher.poll_once() is not None
+    before = (count(matches_raw), count(elo_history), count(head_to_head))
+
+    assert watcher.poll_once() is None
+    assert Watcher(url=site.url).poll_once() is None
+    assert (count(matches_raw), count(elo_history), count(head_to_head)) == before
+
+    # a match without a MatchType span is stored as NULL, not 'NaN'
+    with engine.connect() as conn:
+        types = conn.execute(select(matches_raw.c.match_type)).scalars().all()
+    assert None in types and "NaN" not in types
+
+
+def test_legacy_nan_rows_are_normalized_and_not_reingested(site):
+    from src.models import matches_raw_natural_key
+    from src.scraper import ensure_matches_natural_key
+
+    records = prepare_records(pd.DataFrame(parse_results_page(RESULTS_PAGE)))
+    untyped = next(r for r in records if r['match_type'] is None)
+    with engine.begin() as conn:
+        matches_raw_natural_key.drop(conn)
+        # what older scrapes left behind: the text 'NaN', then a NULL duplicate
+        conn.execute(insert(matches_raw), [{**untyped, 'match_type': 'NaN', 'time': 'NaN'}, untyped])
+        conn.execute(insert(head_to_head), [{'wrestler_a': 'Roman Reigns', 'wrestler_b': 'Solo Sikoa', 'meetings': 2}])
+
+    ensure_matches_natural_key()
+
+    with engine.connect() as conn:
+        rows = conn.execute(select(matches_raw.c.match_type, matches_raw.c.time)).all()
+    assert rows == [(None, None)]
+    assert count(head_to_head) == 0
+
+    update = Watcher(url=site.url).poll_once()
+    assert untyped['winners'] not in {m['winners'] for m in update['matches']}
+    assert count(matches_raw) == len(records)
+
+    # the NULL-safe key now rejects a NULL-type duplicate outright
+    with pytest.raises(IntegrityError):
+        with engine.begin() as conn:
+            conn.execute(insert(matches_raw), [untyped])
+
+
+def test_poll_resyncs_ratings_after_batch_replay(site):
+    records = prepare_records(pd.DataFrame(parse_results_page(RESULTS_PAGE)))
+    smackdown = records[-1]
+    with engine.begin() as conn:
+        conn.execute(insert(matches_raw), [smackdown])
+    replay_elo_history()
+    watcher = Watcher(url=site.url)   # loads the replayed ratings
+
+    # bronze is corrected and the batch job replays: same number of history
+    # rows as before, different ratings
+    with engine.begin() as conn:
+        conn.execute(matches_raw.delete())
+        conn.execute(insert(matches_raw), [{
+            **smackdown, 'date': datetime.date(2025, 1, 2),
+            'winners': "Cody Rhodes", 'losers': "Roman Reigns",
+        }])
+    replay_elo_history()
+    with engine.connect() as conn:
+        corrected = conn.execute(select(current_elo.c.elo)
+                                 .where(current_elo.c.wrestler == "Cody Rhodes")).scalar()
+
+    watcher.poll_once()   # re-ingests SmackDown 01-03, then RAW 01-06
+
+    with engine.connect() as conn:
+        before = conn.execute(
+            select(elo_history.c.elo_before)
+            .where(elo_history.c.wrestler == "Cody Rhodes",
+                   elo_history.c.date == datetime.date(2025, 1, 3))
+        ).scalar()
+    # the watcher's first Cody match continues from the corrected rating
+    assert before == pytest.approx(corrected)
+
+
+def test_replay_reproduces_watch_mode_ratings(site):
+    # SmackDown (01-03) is loaded and replayed first …
+    records = prepare_records(pd.DataFrame(parse_results_page(RESULTS_PAGE)))
+    with engine.begin() as conn:
+        conn.execute(insert(matches_raw), [records[-1]])
+    replay_elo_history()
+
+    # … then the watcher picks up RAW (01-06) with higher ids
+    Watcher(url=site.url).poll_once()
+    with engine.connect() as conn:
+        pushed = dict(conn.execute(select(current_elo.c.wrestler, current_elo.c.elo)).all())
+        net = conn.execute(select(head_to_head.c.net_elo_a, head_to_head.c.net_elo_b)
+                           .where(head_to_head.c.wrestler_a == "Cody Rhodes",
+                                  head_to_head.c.wrestler_b == "Kevin Owens")).one()
+
+    replay_elo_history()
+    with engine.connect() as conn:
+        replayed = dict(conn.execute(select(current_elo.c.wrestler, current_elo.c.elo)).all())
+        cody = conn.execute(select(func.sum(elo_history.c.elo_change))
+                            .where(elo_history.c.wrestler == "Cody Rhodes")).scalar()
+
+    assert replayed == pytest.approx(pushed)
+    # head_to_head net Elo still agrees with the replayed history
+    assert net.net_elo_a == pytest.approx(cody)
+
+
+def test_sse_subscriber_receives_elo_event(site):
+    from src.api.stream import run_watcher, stream_elo
+
+    site.page = EMPTY_PAGE
+
+    async def scenario():
+        response = await stream_elo()
+        events = response.body_iterator
+        assert (await events.__anext__()).startswith(": connected")
+
+        watcher = asyncio.create_task(run_watcher(1, url=site.url))
+        try:
+            await asyncio.sleep(0.5)
+            site.page = RESULTS_PAGE   # a result gets posted
+            while True:
+                chunk = await asyncio.wait_for(events.__anext__(), timeout=15)
+                if chunk.startswith("event: elo"):
+                    return chunk
+        finally:
+            watcher.cancel()
+            await events.aclose()
+
+    chunk = asyncio.run(scenario())
+    data = chunk.split("data: ", 1)[1].strip()
+
+    def reject(constant):
+        raise ValueError(f"non-JSON constant {constant}")
+
+    # strict like the browser's JSON.parse: no NaN/Infinity
+    update = json.loads(data, parse_constant=reject)
+    assert len(update["matches"]) == 4
+    assert {r["wrestler"] for r in update["ratings"]} >= {"Cody Rhodes", "Roman Reigns"}
+
+
+def test_watcher_startup_failure_is_retried(site, monkeypatch, capsys):
+    import src.watch
+    from src.api.stream import broadcaster, run_watcher
+
+    real = src.watch.Watcher
+    attempts = []
+
+    def flaky(*args, **kwargs):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("database is starting up")
+        return real(*args, **kwargs)
+
+    monkeypatch.setattr(src.watch, "Watcher", flaky)
+
+    async def scenario():
+        queue = broadcaster.subscribe()
+        task = asyncio.create_task(run_watcher(1, url=site.url))
+        try:
+            return await asyncio.wait_for(queue.get(), timeout=15)
+        finally:
+            task.cancel()
+            broadcaster.unsubscribe(queue)
+
+    update = asyncio.run(scenario())
+    assert len(attempts) == 2
+    assert len(update["matches"]) == 4
+    assert "database is starting up" in capsys.readouterr().out